@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
 from math import inf
 from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass
@@ -18,7 +19,8 @@ class EpisodeCounter:
     heatup: int = 0
     exploration: int = 0
     evaluation: int = 0
-    lock = mp.Lock()
+    # process local, only the shared counters need a real lock
+    lock = nullcontext()
 
     def __iadd__(self, other):
         self.heatup += other.heatup
@@ -33,7 +35,7 @@ class StepCounter:
     exploration: int = 0
     evaluation: int = 0
     update: int = 0
-    lock = mp.Lock()
+    lock = nullcontext()
 
     def __iadd__(self, other):
         self.heatup += other.heatup
@@ -45,11 +47,14 @@ class StepCounter:
 
 class StepCounterShared(StepCounter):
     # pylint: disable=super-init-not-called
-    def __init__(self):
-        self._heatup: mp.Value = mp.Value("i", 0)
-        self._exploration: mp.Value = mp.Value("i", 0)
-        self._evaluation: mp.Value = mp.Value("i", 0)
-        self._update: mp.Value = mp.Value("i", 0)
+    def __init__(self, start_method: Optional[str] = None):
+        ctx = mp.get_context(start_method)
+        # per instance, a class level lock is not shared with spawned processes
+        self.lock = ctx.Lock()
+        self._heatup: mp.Value = ctx.Value("i", 0)
+        self._exploration: mp.Value = ctx.Value("i", 0)
+        self._evaluation: mp.Value = ctx.Value("i", 0)
+        self._update: mp.Value = ctx.Value("i", 0)
 
     @property
     def heatup(self) -> int:
@@ -93,10 +98,12 @@ class StepCounterShared(StepCounter):
 
 class EpisodeCounterShared(EpisodeCounter):
     # pylint: disable=super-init-not-called
-    def __init__(self):
-        self._heatup: mp.Value = mp.Value("i", 0)
-        self._exploration: mp.Value = mp.Value("i", 0)
-        self._evaluation: mp.Value = mp.Value("i", 0)
+    def __init__(self, start_method: Optional[str] = None):
+        ctx = mp.get_context(start_method)
+        self.lock = ctx.Lock()
+        self._heatup: mp.Value = ctx.Value("i", 0)
+        self._exploration: mp.Value = ctx.Value("i", 0)
+        self._evaluation: mp.Value = ctx.Value("i", 0)
 
     @property
     def heatup(self) -> int:
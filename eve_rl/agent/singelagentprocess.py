@@ -1,11 +1,15 @@
+from copy import deepcopy
 import platform
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 from random import randint
+import ctypes
 import logging
 import logging.config
 import os
 import traceback
 import queue
+from enum import IntEnum
+from multiprocessing.connection import wait
 
 from torch import multiprocessing as mp
 import torch
@@ -19,6 +23,7 @@ from .agent import (
 )
 from .single import Single, Algo, ReplayBuffer, gym
 from ..replaybuffer import Episode
+from ..util import clear_and_close_queues
 
 
 def file_handler_callback(handler: logging.FileHandler):
@@ -42,8 +47,59 @@ def file_handler_callback(handler: logging.FileHandler):
 
 handler_callback = {logging.FileHandler: file_handler_callback}
 
+thread_env_vars = ["OMP_NUM_THREADS", "MKL_NUM_THREADS"]
+
+# imported once by the forkserver, so forked workers skip the import
+forkserver_preload = ["numpy", "torch", "gymnasium", "eve_rl"]
+
+
+class TaskType(IntEnum):
+    HEATUP = 0
+    EXPLORE = 1
+    EVALUATE = 2
+    UPDATE = 3
+    EXPLORE_AND_UPDATE = 4
+    STATE_DICTS_NETWORK = 5
+    LOAD_STATE_DICTS_NETWORK = 6
+    STATE_DICTS_OPTIMIZER = 7
+    LOAD_STATE_DICTS_OPTIMIZER = 8
+    STATE_DICTS_SCHEDULER = 9
+    LOAD_STATE_DICTS_SCHEDULER = 10
+    SHUTDOWN = 11
+
+
+logging_config_cache = {}
+
+
+def handler_cache_key(handler: logging.Handler) -> Tuple:
+    # the attributes the handler config is built from. ids are not used, they
+    # are reused by new handlers once old ones are garbage collected
+    # pylint: disable=protected-access
+    fmt = handler.formatter._fmt if handler.formatter is not None else None
+    return (
+        type(handler),
+        handler.name,
+        handler.level,
+        getattr(handler, "baseFilename", None),
+        getattr(handler, "mode", None),
+        fmt,
+    )
+
 
 def get_logging_config_dict():
+    # root handlers rarely change, so the config is only built once per setup
+    cache_key = (
+        logging.root.level,
+        logging.root.propagate,
+        tuple(handler_cache_key(handler) for handler in logging.root.handlers),
+    )
+    if cache_key not in logging_config_cache:
+        logging_config_cache.clear()
+        logging_config_cache[cache_key] = build_logging_config_dict()
+    return deepcopy(logging_config_cache[cache_key])
+
+
+def build_logging_config_dict():
     config = {
         "version": 1,
         "disable_existing_loggers": False,
@@ -69,42 +125,145 @@ def get_logging_config_dict():
     return config
 
 
+def share_state_dicts(state_dicts: Dict[str, Any]) -> Dict[str, Any]:
+    shared = {}
+    for key, value in state_dicts.items():
+        if isinstance(value, dict):
+            shared[key] = share_state_dicts(value)
+        elif isinstance(value, torch.Tensor):
+            shared[key] = value.detach().to("cpu", copy=True).share_memory_()
+        else:
+            shared[key] = deepcopy(value)
+    return shared
+
+
+def copy_state_dicts(
+    source: Dict[str, Any], destination: Dict[str, Any], non_blocking: bool = False
+) -> None:
+    for key, value in source.items():
+        if isinstance(value, dict):
+            copy_state_dicts(value, destination[key], non_blocking)
+        elif isinstance(value, torch.Tensor):
+            dest_tensor = destination[key]
+            # skip the copy if both already point to the same storage
+            if dest_tensor.data_ptr() != value.data_ptr():
+                dest_tensor.copy_(value, non_blocking=non_blocking)
+
+
+def state_dicts_tensors(state_dicts: Dict[str, Any]) -> Iterator[torch.Tensor]:
+    for value in state_dicts.values():
+        if isinstance(value, dict):
+            yield from state_dicts_tensors(value)
+        elif isinstance(value, torch.Tensor):
+            yield value
+
+
+def cuda_get_last_error() -> Optional[Callable[[], int]]:
+    # torch.cuda.cudart() does not bind cudaGetLastError. it has to come from the
+    # runtime torch loaded, another libcudart copy keeps its own error state
+    try:
+        with open("/proc/self/maps", encoding="utf-8") as maps:
+            # the path is the sixth column and may contain spaces
+            paths = {
+                line.split(maxsplit=5)[5].strip()
+                for line in maps
+                if "libcudart" in line
+            }
+    except OSError:
+        return None
+    if len(paths) != 1:
+        return None
+    return ctypes.CDLL(paths.pop()).cudaGetLastError
+
+
+def pin_state_dicts(
+    state_dicts_list: List[Dict[str, Any]], pinned_ptrs: List[int]
+) -> Optional[str]:
+    # page-locks the shared cpu buffers in place, so copies between them and the
+    # gpu use dma. all or nothing, on failure every buffer is unpinned again and
+    # the reason returned
+    get_last_error = cuda_get_last_error()
+    if get_last_error is None:
+        return "cudaGetLastError of the loaded cuda runtime not found"
+    cudart = torch.cuda.cudart()
+    for state_dicts in state_dicts_list:
+        for tensor in state_dicts_tensors(state_dicts):
+            if tensor.is_cuda or tensor.is_pinned() or not tensor.numel():
+                continue
+            ptr = tensor.data_ptr()
+            error = cudart.cudaHostRegister(
+                ptr, tensor.numel() * tensor.element_size(), 0
+            )
+            if error != cudart.cudaError.success:
+                # not sticky, but the next kernel launch check would raise it
+                get_last_error()
+                unpin_state_dicts(pinned_ptrs)
+                return cudart.cudaGetErrorString(error)
+            pinned_ptrs.append(ptr)
+    return None
+
+
+def unpin_state_dicts(pinned_ptrs: List[int]) -> None:
+    cudart = torch.cuda.cudart()
+    for ptr in pinned_ptrs:
+        cudart.cudaHostUnregister(ptr)
+    pinned_ptrs.clear()
+
+
 def run(
     algo: Algo,
-    env_train: gym.Env,
-    env_eval: gym.Env,
+    env_train: Union[gym.Env, Callable[[], gym.Env]],
+    env_eval: Union[gym.Env, Callable[[], gym.Env]],
     replay_buffer: ReplayBuffer,
     device: torch.device,
     consecutive_action_steps: int,
     normalize_actions,
     log_config_dict: Dict,
-    task_queue,
+    control_queue,
+    work_queue,
     result_queue,
     model_queue,
+    shared_state_dicts_network,
+    shared_front_buffer,
     step_counter,
     episode_counter,
     shutdown,
     is_shutdown,
     name,
     nice_level: int,
+    torch_threads: int,
+    compile_update: bool,
+    seed: Optional[int],
 ):
     if platform.system() != "Windows":
         os.nice(nice_level)
 
+    pinned_ptrs = []
     try:
-        torch.set_num_threads(4)
+        # torch is imported before run, so OMP_NUM_THREADS and MKL_NUM_THREADS set
+        # here would be ignored. spawned children get them from the parent
+        torch.set_num_threads(torch_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # already fixed if the process was forked after torch did parallel work
+            pass
         for handler_name, handler_config in log_config_dict["handlers"].items():
             if "filename" in handler_config.keys():
                 filename = handler_config["filename"]
                 path, _ = os.path.split(filename)
                 path = os.path.join(path, "logs_subprocesses")
-                if not os.path.isdir(path):
-                    os.mkdir(path)
+                os.makedirs(path, exist_ok=True)
                 filename = os.path.join(path, f"{name}.log")
                 log_config_dict["handlers"][handler_name]["filename"] = filename
         logging.config.dictConfig(log_config_dict)
         logger = logging.getLogger(__name__)
         logger.info("logger initialized")
+        # env factories are called here, so the env is never pickled
+        if not isinstance(env_train, gym.Env):
+            env_train = env_train()
+        if not isinstance(env_eval, gym.Env):
+            env_eval = env_eval()
         agent = Single(
             algo,
             env_train,
@@ -113,97 +272,192 @@ def run(
             device,
             consecutive_action_steps,
             normalize_actions,
+            seed=seed,
         )
         agent.step_counter = step_counter
         agent.episode_counter = episode_counter
-        while not shutdown.is_set():
+        if compile_update and isinstance(agent.algo, Algo):
+            if hasattr(torch.nn.Module, "compile"):
+                # the networks are compiled in place, compiling algo.update itself
+                # recompiles on every step for its python side counters
+                for module in vars(agent.algo.model).values():
+                    if isinstance(module, torch.nn.Module):
+                        module.compile(dynamic=False)
+            else:
+                logger.warning("torch.compile not available, updating uncompiled")
+        copy_stream = torch.cuda.Stream(device) if device.type == "cuda" else None
+
+        def pin_shared_state_dicts_network():
+            error = pin_state_dicts(shared_state_dicts_network, pinned_ptrs)
+            if error is not None:
+                log_warn = f"Shared state dicts stay pageable, pinning failed: {error}"
+                logger.warning(log_warn)
+
+        if copy_stream is not None and shared_state_dicts_network is not None:
+            pin_shared_state_dicts_network()
+        no_result = object()
+
+        def heatup(steps, episodes, step_limit, episode_limit, action_low, action_high):
+            return agent.heatup(
+                steps=steps,
+                episodes=episodes,
+                step_limit=step_limit,
+                episode_limit=episode_limit,
+                custom_action_low=action_low,
+                custom_action_high=action_high,
+            )
+
+        def explore(steps, episodes, step_limit, episode_limit):
+            return agent.explore(
+                steps=steps,
+                episodes=episodes,
+                step_limit=step_limit,
+                episode_limit=episode_limit,
+            )
+
+        def evaluate(steps, episodes, step_limit, episode_limit, seeds, options):
+            return agent.evaluate(
+                steps=steps,
+                episodes=episodes,
+                step_limit=step_limit,
+                episode_limit=episode_limit,
+                seeds=seeds,
+                options=options,
+            )
+
+        def update(steps, step_limit):
             try:
-                task = task_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-            task_name = task[0]
+                return agent.update(steps=steps, step_limit=step_limit)
+            except ValueError as error:
+                log_warning = f"Update Error: {error}"
+                logger.warning(log_warning)
+                shutdown.set()
+                return error
+
+        def explore_and_update(
+            explore_steps,
+            explore_episodes,
+            explore_step_limit,
+            explore_episode_limit,
+            update_steps,
+            update_step_limit,
+            n_batches,
+        ):
+            explore_results, update_results = [], []
+            for _ in range(n_batches):
+                explore_result, update_result = agent.explore_and_update(
+                    explore_steps=explore_steps,
+                    explore_episodes=explore_episodes,
+                    explore_step_limit=explore_step_limit,
+                    explore_episode_limit=explore_episode_limit,
+                    update_steps=update_steps,
+                    update_step_limit=update_step_limit,
+                )
+                explore_results += explore_result
+                update_results += update_result
+            return explore_results, update_results
+
+        def state_dicts_network():
+            if not isinstance(agent.algo, Algo):
+                # answered instead of raised, the parent is waiting for a reply
+                model_queue.put(
+                    ValueError(f"{name} has a play only algo without state dicts")
+                )
+                return no_result
+            state_dicts = agent.algo.state_dicts_network()
+            back_buffer = 1 - shared_front_buffer.value
+            # cuda tensors never go to the parent, unpickling them there would
+            # initialize cuda and break every later fork of a worker
+            if copy_stream is None:
+                copy_state_dicts(state_dicts, shared_state_dicts_network[back_buffer])
+            else:
+                copy_stream.wait_stream(torch.cuda.current_stream(device))
+                with torch.cuda.stream(copy_stream):
+                    copy_state_dicts(
+                        state_dicts,
+                        shared_state_dicts_network[back_buffer],
+                        non_blocking=True,
+                    )
+                copy_stream.synchronize()
+            shared_front_buffer.value = back_buffer
+            model_queue.put(None)
+            return no_result
+
+        def load_state_dicts_network(new_shared_state_dicts_network):
+            nonlocal shared_state_dicts_network
+            if new_shared_state_dicts_network is not None:
+                shared_state_dicts_network = new_shared_state_dicts_network
+                if device.type == "cuda":
+                    # pending async copies may still read the old pinned buffers
+                    copy_stream.synchronize()
+                    unpin_state_dicts(pinned_ptrs)
+                    pin_shared_state_dicts_network()
+            agent.algo.load_state_dicts_network(
+                shared_state_dicts_network[shared_front_buffer.value]
+            )
+            # the parent only writes the next back buffer after this ack
+            model_queue.put(None)
+            return no_result
+
+        # cloned into shared memory, pickling would otherwise move the live
+        # optimizer tensors to shared memory and alias them with the parent
+        def state_dicts_optimizer():
+            model_queue.put(share_state_dicts(agent.algo.state_dicts_optimizer()))
+            return no_result
+
+        def load_state_dicts_optimizer(state_dicts):
+            agent.algo.load_state_dicts_optimizer(state_dicts)
+            return no_result
+
+        def state_dicts_scheduler():
+            model_queue.put(share_state_dicts(agent.algo.state_dicts_scheduler()))
+            return no_result
+
+        def load_state_dicts_scheduler(state_dicts):
+            agent.algo.load_state_dicts_scheduler(state_dicts)
+            return no_result
+
+        # indexed by TaskType, SHUTDOWN is handled in the loop itself
+        handlers = [
+            heatup,
+            explore,
+            evaluate,
+            update,
+            explore_and_update,
+            state_dicts_network,
+            load_state_dicts_network,
+            state_dicts_optimizer,
+            load_state_dicts_optimizer,
+            state_dicts_scheduler,
+            load_state_dicts_scheduler,
+        ]
+        while not shutdown.is_set():
+            # blocks until a task arrives, close() always follows the shutdown
+            # event with a SHUTDOWN task, so no periodic wakeup is needed
+            # pylint: disable=protected-access
+            ready = wait([control_queue._reader, work_queue._reader])
+            # control tasks (state dicts, shutdown) take precedence over work
+            if control_queue._reader in ready:
+                task = control_queue.get()
+            else:
+                task = work_queue.get()
+            task_type = task[0]
 
-            if task_name in ["load_state_dicts_network", "state_dicts_network"]:
+            if task_type in [
+                TaskType.LOAD_STATE_DICTS_NETWORK,
+                TaskType.STATE_DICTS_NETWORK,
+            ]:
                 log_debug = f"Received {task[0]=} with {len(task)=}"
             else:
                 log_debug = f"Received {task=}"
             logger.debug(log_debug)
-            if task_name == "heatup":
-                result = agent.heatup(
-                    steps=task[1],
-                    episodes=task[2],
-                    step_limit=task[3],
-                    episode_limit=task[4],
-                    custom_action_low=task[5],
-                    custom_action_high=task[6],
-                )
-            elif task_name == "explore":
-                result = agent.explore(
-                    steps=task[1],
-                    episodes=task[2],
-                    step_limit=task[3],
-                    episode_limit=task[4],
-                )
-            elif task_name == "evaluate":
-                result = agent.evaluate(
-                    steps=task[1],
-                    episodes=task[2],
-                    step_limit=task[3],
-                    episode_limit=task[4],
-                    seeds=task[5],
-                    options=task[6],
-                )
-            elif task_name == "update":
-                try:
-                    result = agent.update(steps=task[1], step_limit=task[2])
-                except ValueError as error:
-                    log_warning = f"Update Error: {error}"
-                    logger.warning(log_warning)
-                    shutdown.set()
-                    result = error
-            elif task_name == "explore_and_update":
-                result = agent.explore_and_update(
-                    explore_steps=task[1],
-                    explore_episodes=task[2],
-                    explore_step_limit=task[3],
-                    explore_episode_limit=task[4],
-                    update_steps=task[5],
-                    update_step_limit=task[6],
-                )
-            elif task_name == "state_dicts_network":
-                destination = task[1]
-                state_dicts = agent.algo.state_dicts_network(destination)
-                model_queue.put(state_dicts)
-                del state_dicts
-                continue
-            elif task_name == "load_state_dicts_network":
-                state_dicts = task[1]
-                agent.algo.load_state_dicts_network(state_dicts)
-                del state_dicts
-                continue
-            elif task_name == "state_dicts_optimizer":
-                state_dicts = agent.algo.state_dicts_optimizer()
-                model_queue.put(state_dicts)
-                del state_dicts
-                continue
-            elif task_name == "load_state_dicts_optimizer":
-                state_dicts = task[1]
-                agent.algo.load_state_dicts_optimizer(state_dicts)
-                del state_dicts
-                continue
-            elif task_name == "state_dicts_scheduler":
-                state_dicts = agent.algo.state_dicts_scheduler()
-                model_queue.put(state_dicts)
-                del state_dicts
-                continue
-            elif task_name == "load_state_dicts_scheduler":
-                state_dicts = task[1]
-                agent.algo.load_state_dicts_scheduler(state_dicts)
-                del state_dicts
-                continue
-            elif task_name == "shutdown":
+            if task_type == TaskType.SHUTDOWN:
                 break
-            else:
+            if not 0 <= task_type < len(handlers):
+                continue
+            # task arguments are unpacked straight into the handler parameters
+            result = handlers[task_type](*task[1:])
+            if result is no_result:
                 continue
             result_queue.put(result)
     except Exception as exception:  # pylint: disable=broad-exception-caught
@@ -211,15 +465,12 @@ def run(
         logger.warning("Traceback:\n" + exception_traceback)
         logger.warning(exception)
         result_queue.put(exception)
+    if pinned_ptrs:
+        unpin_state_dicts(pinned_ptrs)
     agent.close()
 
-    for queue_ in [result_queue, model_queue, task_queue]:
-        while True:
-            try:
-                queue_.get_nowait()
-            except queue.Empty:
-                queue_.close()
-                break
+    for queue_ in [result_queue, model_queue, control_queue, work_queue]:
+        queue_.close()
     is_shutdown.set()
 
 
@@ -228,8 +479,8 @@ class SingleAgentProcess(Agent):
         self,
         agent_id: int,
         algo: Algo,
-        env_train: gym.Env,
-        env_eval: gym.Env,
+        env_train: Union[gym.Env, Callable[[], gym.Env]],
+        env_eval: Union[gym.Env, Callable[[], gym.Env]],
         replay_buffer: ReplayBuffer,
         device: torch.device,
         consecutive_action_steps: int,
@@ -239,32 +490,47 @@ class SingleAgentProcess(Agent):
         step_counter: StepCounterShared = None,
         episode_counter: EpisodeCounterShared = None,
         nice_level: int = 0,
+        torch_threads: int = 1,
+        start_method: Optional[str] = None,
+        compile_update: bool = False,
+        seed: Optional[int] = None,
     ) -> None:
         self.logger = logging.getLogger(self.__module__)
         self.agent_id = agent_id
         self.name = name
-        self._shutdown = mp.Event()
-        self._is_shutdown = mp.Event()
-        self._task_queue = mp.Queue()
-        self._result_queue = mp.Queue()
-        self._model_queue = mp.Queue()
+        # shared counters handed in have to be created with the same start method
+        ctx = mp.get_context(start_method)
+        if ctx.get_start_method() == "forkserver":
+            # only has an effect until the forkserver is running
+            ctx.set_forkserver_preload(forkserver_preload)
+        self._shutdown = ctx.Event()
+        self._is_shutdown = ctx.Event()
+        self._control_queue = ctx.SimpleQueue()
+        self._work_queue = ctx.SimpleQueue()
+        self._result_queue = ctx.SimpleQueue()
+        self._model_queue = ctx.SimpleQueue()
 
         self.device = device
         self.parent_agent = parent_agent
 
-        self._step_counter = step_counter or StepCounterShared()
-        self._episode_counter = episode_counter or EpisodeCounterShared()
+        self._step_counter = step_counter or StepCounterShared(start_method)
+        self._episode_counter = episode_counter or EpisodeCounterShared(start_method)
+        # ping-pong buffers: the writer fills the back buffer and then flips the
+        # index, so the reader never sees a half written front buffer
+        self._shared_front_buffer = ctx.Value("b", 0, lock=False)
+        # play only algos make this a pure actor, updates belong to the learner
+        self.is_learner = isinstance(algo, Algo)
+        if self.is_learner:
+            state_dicts = algo.state_dicts_network()
+            self._shared_state_dicts_network = [
+                share_state_dicts(state_dicts) for _ in range(2)
+            ]
+        else:
+            self._shared_state_dicts_network = None
+        self._load_ack_pending = False
         logging_config = get_logging_config_dict()
 
-        for handler_config in logging_config["handlers"].values():
-            if "filename" in handler_config.keys():
-                filename = handler_config["filename"]
-                path, _ = os.path.split(filename)
-                path = os.path.join(path, "logs_subprocesses")
-                if not os.path.isdir(path):
-                    os.mkdir(path)
-
-        self._process = mp.Process(
+        self._process = ctx.Process(
             target=run,
             args=[
                 algo,
@@ -275,19 +541,34 @@ class SingleAgentProcess(Agent):
                 consecutive_action_steps,
                 normalize_actions,
                 logging_config,
-                self._task_queue,
+                self._control_queue,
+                self._work_queue,
                 self._result_queue,
                 self._model_queue,
+                self._shared_state_dicts_network,
+                self._shared_front_buffer,
                 self.step_counter,
                 self.episode_counter,
                 self._shutdown,
                 self._is_shutdown,
                 name,
                 nice_level,
+                torch_threads,
+                compile_update,
+                seed,
             ],
             name=name,
         )
+        # the thread limits have to be in the environment before the new
+        # interpreter imports torch
+        env_backup = {env_var: os.environ.get(env_var) for env_var in thread_env_vars}
+        os.environ.update({env_var: str(torch_threads) for env_var in thread_env_vars})
         self._process.start()
+        for env_var, value in env_backup.items():
+            if value is None:
+                os.environ.pop(env_var)
+            else:
+                os.environ[env_var] = value
 
     def heatup(
         self,
@@ -299,16 +580,16 @@ class SingleAgentProcess(Agent):
         custom_action_low: Optional[List[float]] = None,
         custom_action_high: Optional[List[float]] = None,
     ) -> None:
-        self._task_queue.put(
-            [
-                "heatup",
+        self._work_queue.put(
+            (
+                TaskType.HEATUP,
                 steps,
                 episodes,
                 step_limit,
                 episode_limit,
                 custom_action_low,
                 custom_action_high,
-            ]
+            )
         )
 
     def explore(
@@ -320,10 +601,10 @@ class SingleAgentProcess(Agent):
         episode_limit: Optional[int] = None,
     ) -> None:
         try:
-            self._task_queue.put(
-                ["explore", steps, episodes, step_limit, episode_limit]
+            self._work_queue.put(
+                (TaskType.EXPLORE, steps, episodes, step_limit, episode_limit)
             )
-        except ValueError:
+        except (ValueError, OSError):
             self.close()
 
     def evaluate(
@@ -337,18 +618,27 @@ class SingleAgentProcess(Agent):
         options: Optional[List[Dict[str, Any]]] = None,
     ) -> None:
         try:
-            self._task_queue.put(
-                ["evaluate", steps, episodes, step_limit, episode_limit, seeds, options]
+            self._work_queue.put(
+                (
+                    TaskType.EVALUATE,
+                    steps,
+                    episodes,
+                    step_limit,
+                    episode_limit,
+                    seeds,
+                    options,
+                )
             )
-        except ValueError:
+        except (ValueError, OSError):
             self.close()
 
     def update(
         self, *, steps: Optional[int] = None, step_limit: Optional[int] = None
     ) -> None:
+        self._check_learner()
         try:
-            self._task_queue.put(["update", steps, step_limit])
-        except ValueError:
+            self._work_queue.put((TaskType.UPDATE, steps, step_limit))
+        except (ValueError, OSError):
             self.close()
 
     def explore_and_update(
@@ -360,84 +650,141 @@ class SingleAgentProcess(Agent):
         explore_episode_limit: Optional[int] = None,
         update_steps: Optional[int] = None,
         update_step_limit: Optional[int] = None,
+        n_batches: int = 1,
     ) -> Tuple[List[Episode], List[float]]:
+        self._check_learner()
         try:
-            self._task_queue.put(
-                [
-                    "explore_and_update",
+            self._work_queue.put(
+                (
+                    TaskType.EXPLORE_AND_UPDATE,
                     explore_steps,
                     explore_episodes,
                     explore_step_limit,
                     explore_episode_limit,
                     update_steps,
                     update_step_limit,
-                ]
+                    n_batches,
+                )
             )
-        except ValueError:
+        except (ValueError, OSError):
             self.close()
 
+    def _check_learner(self):
+        if not self.is_learner:
+            raise ValueError(f"{self.name} has a play only algo and cannot update")
+
     def get_result(self, timeout: float) -> List[Any]:
         try:
-            result = self._result_queue.get(timeout=timeout)
-        except queue.Empty as error:
-            result = error
-        except ValueError:
+            if wait([self.result_reader], timeout=timeout):
+                result = self._result_queue.get()
+            else:
+                result = queue.Empty()
+        except (ValueError, OSError):
             self.close()
             result = []
         return result
 
     def state_dicts_network(self, destination: Dict[str, Any] = None) -> Dict[str, Any]:
         try:
-            self._task_queue.put(["state_dicts_network", destination])
-            return self._model_queue.get()
-        except ValueError:
+            self._wait_load_ack()
+            self._control_queue.put((TaskType.STATE_DICTS_NETWORK,))
+            reply = self._get_model_reply()
+        except (ValueError, OSError):
             self.close()
             return None
+        if isinstance(reply, Exception):
+            raise reply
+        source = self._shared_state_dicts_network[self._shared_front_buffer.value]
+        if destination is None:
+            return deepcopy(source)
+        copy_state_dicts(source, destination)
+        return destination
 
     def load_state_dicts_network(self, states_dict: Dict[str, Any]):
         try:
-            self._task_queue.put(["load_state_dicts_network", states_dict])
-        except ValueError:
+            # the process might still be copying from the buffer written last time
+            self._wait_load_ack()
+            if self._shared_state_dicts_network is None:
+                # first transfer hands the shared tensors to the process once
+                self._shared_state_dicts_network = [
+                    share_state_dicts(states_dict) for _ in range(2)
+                ]
+                shared = self._shared_state_dicts_network
+            else:
+                back_buffer = 1 - self._shared_front_buffer.value
+                copy_state_dicts(
+                    states_dict, self._shared_state_dicts_network[back_buffer]
+                )
+                self._shared_front_buffer.value = back_buffer
+                shared = None
+            self._control_queue.put((TaskType.LOAD_STATE_DICTS_NETWORK, shared))
+            self._load_ack_pending = True
+        except (ValueError, OSError):
             self.close()
 
+    def _wait_load_ack(self):
+        if self._load_ack_pending:
+            self._get_model_reply()
+            self._load_ack_pending = False
+
+    def _get_model_reply(self) -> Any:
+        # pylint: disable=protected-access
+        reader = self._model_queue._reader
+        if self._process is None or reader not in wait(
+            [reader, self._process.sentinel]
+        ):
+            raise OSError(f"{self.name} exited without replying")
+        return self._model_queue.get()
+
     def state_dicts_optimizer(self) -> Dict[str, Any]:
         try:
-            self._task_queue.put(["state_dicts_optimizer"])
-            return self._model_queue.get()
-        except ValueError:
+            self._wait_load_ack()
+            self._control_queue.put((TaskType.STATE_DICTS_OPTIMIZER,))
+            return self._get_model_reply()
+        except (ValueError, OSError):
             self.close()
             return None
 
     def load_state_dicts_optimizer(self, states_dict: Dict[str, Any]):
         try:
-            self._task_queue.put(["load_state_dicts_optimizer", states_dict])
-        except ValueError:
+            # a clone is shared, pickling would move the caller's live tensors
+            shared = share_state_dicts(states_dict)
+            self._control_queue.put((TaskType.LOAD_STATE_DICTS_OPTIMIZER, shared))
+        except (ValueError, OSError):
             self.close()
 
     def state_dicts_scheduler(self) -> Dict[str, Any]:
         try:
-            self._task_queue.put(["state_dicts_scheduler"])
-            return self._model_queue.get()
-        except ValueError:
+            self._wait_load_ack()
+            self._control_queue.put((TaskType.STATE_DICTS_SCHEDULER,))
+            return self._get_model_reply()
+        except (ValueError, OSError):
             self.close()
             return None
 
     def load_state_dicts_scheduler(self, states_dict: Dict[str, Any]):
         try:
-            self._task_queue.put(["load_state_dicts_scheduler", states_dict])
-        except ValueError:
+            shared = share_state_dicts(states_dict)
+            self._control_queue.put((TaskType.LOAD_STATE_DICTS_SCHEDULER, shared))
+        except (ValueError, OSError):
             self.close()
 
     def close(self) -> None:
         if self._process is not None and self._process.is_alive():
             self._shutdown.set()
-            self._task_queue.put(["shutdown"])
+            self._control_queue.put((TaskType.SHUTDOWN,))
             self._process.join(5)
             exitcode = self._process.exitcode
             if exitcode is None:
                 if not self._is_shutdown.is_set():
-                    self._clear_queues()
-                    self._close_queues()
+                    clear_and_close_queues(
+                        [
+                            self._result_queue,
+                            self._model_queue,
+                            self._control_queue,
+                            self._work_queue,
+                        ]
+                    )
                 self._process.kill()
                 self._process.join()
             self._process.close()
@@ -448,17 +795,22 @@ class SingleAgentProcess(Agent):
             return False
         return self._process.is_alive()
 
-    def _clear_queues(self):
-        for queue_ in [self._result_queue, self._model_queue, self._task_queue]:
-            while True:
-                try:
-                    queue_.get_nowait()
-                except (queue.Empty, ValueError):
-                    break
-
-    def _close_queues(self):
-        for queue_ in [self._result_queue, self._model_queue, self._task_queue]:
-            queue_.close()
+    @property
+    def result_reader(self):
+        # pylint: disable=protected-access
+        return self._result_queue._reader
+
+    @staticmethod
+    def wait_any(
+        agents: List["SingleAgentProcess"], timeout: Optional[float] = None
+    ) -> List["SingleAgentProcess"]:
+        readers = {agent.result_reader: agent for agent in agents}
+        try:
+            ready = wait(list(readers.keys()), timeout=timeout)
+        except (ValueError, OSError):
+            # closed queues are handled by get_result of the respective agent
+            return list(agents)
+        return [readers[reader] for reader in ready]
 
     @property
     def step_counter(self) -> StepCounterShared:
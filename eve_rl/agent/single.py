@@ -20,12 +20,14 @@ class SingleEvalOnly(AgentEvalOnly):
         env_eval: gym.Env,
         device: torch.device = torch.device("cpu"),
         normalize_actions: bool = True,
+        render: bool = True,
     ) -> None:
         self.logger = logging.getLogger(self.__module__)
         self.device = device
         self.algo = algo
         self.env_eval = env_eval
         self.normalize_actions = normalize_actions
+        self.render = render
 
         self.step_counter = StepCounter()
         self.episode_counter = EpisodeCounter()
@@ -55,8 +57,16 @@ class SingleEvalOnly(AgentEvalOnly):
         n_episodes = 0
         n_steps = 0
 
-        while True:
+        seeded = seeds is not None or options is not None
+        while not (seeded and not seeds and not options):
             with self.episode_counter.lock:
+                # reserved before playing, so parallel workers stop at the limit
+                # together instead of each finishing one more episode
+                if (
+                    self.step_counter.evaluation >= step_limit
+                    or self.episode_counter.evaluation >= episode_limit
+                ):
+                    break
                 self.episode_counter.evaluation += 1
 
             next_seed = seeds.pop(-1) if seeds is not None else None
@@ -77,13 +87,6 @@ class SingleEvalOnly(AgentEvalOnly):
             n_steps += n_steps_episode
             episodes_data.append(episode)
 
-            if (
-                (not seeds and not options)
-                or self.step_counter.evaluation > step_limit
-                or self.episode_counter.evaluation > episode_limit
-            ):
-                break
-
         t_duration = perf_counter() - t_start
         self._log_task_completion("evaluation", n_steps, t_duration, n_episodes)
         return episodes_data
@@ -105,19 +108,23 @@ class SingleEvalOnly(AgentEvalOnly):
         flat_obs, flat_obs_to_obs = flatten_obs(obs)
         episode = Episode(obs, flat_obs, flat_obs_to_obs, seed, options)
 
+        # the action space is fixed within an episode, no need to query it every step
+        action_shape = env.action_space.shape
+        action_scale = (env.action_space.high - env.action_space.low) / 2
+        action_bias = (env.action_space.high + env.action_space.low) / 2
+
         while not (terminal or truncation):
             action = action_function(flat_obs)
+            env_action = action.reshape(action_shape)
+            if self.normalize_actions:
+                env_action = env_action * action_scale + action_bias
 
             for _ in range(consecutive_actions):
-                env_action = action.reshape(env.action_space.shape)
-                if self.normalize_actions:
-                    env_action = (env_action + 1) / 2 * (
-                        env.action_space.high - env.action_space.low
-                    ) + env.action_space.low
                 obs, reward, terminal, truncation, info = env.step(env_action)
-                flat_obs, _ = flatten_obs(obs)
+                flat_obs, _ = flatten_obs(obs, flat_obs_to_obs)
                 step_counter += 1
-                env.render()
+                if self.render:
+                    env.render()
                 episode.add_transition(
                     obs, flat_obs, action, reward, terminal, truncation, info
                 )
@@ -167,6 +174,8 @@ class Single(SingleEvalOnly, Agent):
         device: torch.device = torch.device("cpu"),
         consecutive_action_steps: int = 1,
         normalize_actions: bool = True,
+        render: bool = True,
+        seed: Optional[int] = None,
     ) -> None:
         self.logger = logging.getLogger(self.__module__)
         self.device = device
@@ -176,6 +185,8 @@ class Single(SingleEvalOnly, Agent):
         self.replay_buffer = replay_buffer
         self.consecutive_action_steps = consecutive_action_steps
         self.normalize_actions = normalize_actions
+        self.render = render
+        self.seed = seed
 
         self.update_error = False
 
@@ -184,6 +195,8 @@ class Single(SingleEvalOnly, Agent):
         self.to(device)
         self._next_batch = None
         self._replay_too_small = True
+        # own stream for heatup actions, forked workers would share the global state
+        self._rng = np.random.default_rng(seed)
         self.logger.info("Single agent initialized")
 
     def heatup(
@@ -211,24 +224,23 @@ class Single(SingleEvalOnly, Agent):
 
         episodes_data = []
 
-        def random_action(*args, **kwargs):  # pylint: disable=unused-argument
-            env_low = self.env_train.action_space.low.reshape(-1)
-            env_high = self.env_train.action_space.high.reshape(-1)
-
-            if custom_action_low is not None:
-                action_low = np.array(custom_action_low).reshape(-1)
-            else:
-                action_low = env_low.reshape(-1)
-            if custom_action_high is not None:
-                action_high = np.array(custom_action_high).reshape(-1)
-            else:
-                action_high = env_high.reshape(-1)
-            action = np.random.uniform(action_low, action_high)
-
-            if self.normalize_actions:
-                action = 2 * (action - env_low) / (env_high - env_low) - 1
+        env_low = self.env_train.action_space.low.ravel()
+        env_high = self.env_train.action_space.high.ravel()
+        if custom_action_low is not None:
+            action_low = np.asarray(custom_action_low, dtype=env_low.dtype).ravel()
+        else:
+            action_low = env_low
+        if custom_action_high is not None:
+            action_high = np.asarray(custom_action_high, dtype=env_high.dtype).ravel()
+        else:
+            action_high = env_high
+        if self.normalize_actions:
+            # sample directly in the normalized space
+            action_low = 2 * (action_low - env_low) / (env_high - env_low) - 1
+            action_high = 2 * (action_high - env_low) / (env_high - env_low) - 1
 
-            return action
+        def random_action(*args, **kwargs):  # pylint: disable=unused-argument
+            return self._rng.uniform(action_low, action_high)
 
         n_episodes = 0
         n_steps = 0
@@ -320,6 +332,8 @@ class Single(SingleEvalOnly, Agent):
                 self.step_counter.update += 1
             batch = self.replay_buffer.sample()
             result = self.algo.update(batch)
+            if batch.indices is not None:
+                self.replay_buffer.update_priorities(batch.indices, self.algo.td_errors)
             results.append(result)
             n_steps += 1
 
@@ -350,7 +364,9 @@ class Single(SingleEvalOnly, Agent):
         self.env_train.close()
         if id(self.env_train) != id(self.env_eval):
             self.env_eval.close()
-        self.replay_buffer.close()
+        # eval only workers run without a replay buffer
+        if self.replay_buffer is not None:
+            self.replay_buffer.close()
         del self.algo
         del self.replay_buffer
 
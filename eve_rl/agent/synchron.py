@@ -1,15 +1,18 @@
 from copy import deepcopy
 from importlib import import_module
-from time import perf_counter, sleep
-from typing import Any, Dict, List, Optional, Tuple
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from math import inf
 import logging
+import os
+import numpy as np
 import torch
 import queue
 
 from ..util import DummyEnv
 from .agent import (
     Agent,
+    AgentEvalOnly,
     Episode,
     StepCounterShared,
     EpisodeCounterShared,
@@ -19,11 +22,11 @@ from .singelagentprocess import SingleAgentProcess
 from ..util import ConfigHandler
 
 
-class SynchronEvalOnly(Agent):
+class SynchronEvalOnly(AgentEvalOnly):
     def __init__(
         self,
         algo: Algo,
-        env_eval: gym.Env,
+        env_eval: Union[gym.Env, Callable[[], gym.Env]],
         n_worker: int,
         worker_device: torch.device = torch.device("cpu"),
         normalize_actions: bool = True,
@@ -100,7 +103,6 @@ class SynchronEvalOnly(Agent):
     def _worker_load_state_dicts_network(self, state_dicts: Dict[str, Any]):
         for agent in self.worker:
             agent.load_state_dicts_network(state_dicts)
-            sleep(0.1)
 
     def _get_worker_results(self, step_limit: int, episode_limit: int, task: str):
         episode_results = []
@@ -131,11 +133,16 @@ class SynchronEvalOnly(Agent):
         episode_results,
         results_pending,
         t_limit_result,
+        timeout: float = 0.1,
     ):
         remove = []
         add = []
+        ready = SingleAgentProcess.wait_any(results_pending, timeout=timeout)
         for agent in results_pending:
-            result = agent.get_result(timeout=0.1)
+            if agent in ready:
+                result = agent.get_result(timeout=0)
+            else:
+                result = queue.Empty()
             if isinstance(result, queue.Empty):
                 if not agent.is_alive():
                     log_warn = (
@@ -220,6 +227,7 @@ class SynchronEvalOnly(Agent):
             step_counter=self.step_counter,
             episode_counter=self.episode_counter,
             nice_level=10,
+            torch_threads=max(1, (os.cpu_count() or 1) // self.n_worker),
         )
 
     def load_checkpoint(self, file_path: str) -> None:
@@ -267,8 +275,8 @@ class Synchron(SynchronEvalOnly, Agent):
     def __init__(  # pylint: disable=super-init-not-called
         self,
         algo: Algo,
-        env_train: gym.Env,
-        env_eval: gym.Env,
+        env_train: Union[gym.Env, Callable[[], gym.Env]],
+        env_eval: Union[gym.Env, Callable[[], gym.Env]],
         replay_buffer: ReplayBuffer,
         n_worker: int,
         worker_device: torch.device = torch.device("cpu"),
@@ -276,6 +284,9 @@ class Synchron(SynchronEvalOnly, Agent):
         consecutive_action_steps: int = 1,
         normalize_actions: bool = True,
         timeout_worker_after_reaching_limit: float = 90,
+        compile_update: bool = False,
+        optimizer_fetch_interval: int = 10,
+        seed: Optional[int] = None,
     ) -> None:
         self.algo = algo
         self.algo.to(torch.device("cpu"))
@@ -286,6 +297,12 @@ class Synchron(SynchronEvalOnly, Agent):
         self.consecutive_action_steps = consecutive_action_steps
         self.normalize_actions = normalize_actions
         self.timeout_worker_after_reaching_limit = timeout_worker_after_reaching_limit
+        self.compile_update = compile_update
+        # trainer restarts fall back to optimizer states at most this many updates old
+        self.optimizer_fetch_interval = optimizer_fetch_interval
+        self.seed = seed
+        # every created worker, restarts included, spawns its own heatup stream
+        self._worker_seeds = np.random.SeedSequence(seed)
 
         self.logger = logging.getLogger(self.__module__)
         self.n_worker = n_worker
@@ -300,6 +317,7 @@ class Synchron(SynchronEvalOnly, Agent):
         self.trainer = self._create_trainer_agent()
 
         self.update_error = False
+        self._updates_since_optimizer_fetch = 0
 
         self._eval_seeds = None
         self._eval_options = None
@@ -436,6 +454,11 @@ class Synchron(SynchronEvalOnly, Agent):
         results_pending = self.worker.copy()
         t_limit_result = inf
         while True:
+            # one wait for workers and trainer, whichever finishes first
+            waiting = results_pending.copy()
+            if not got_trainer_results:
+                waiting.append(self.trainer)
+            SingleAgentProcess.wait_any(waiting, timeout=0.5)
             if not got_worker_results:
                 (
                     results_pending,
@@ -448,6 +471,7 @@ class Synchron(SynchronEvalOnly, Agent):
                     explore_results,
                     results_pending,
                     t_limit_result,
+                    timeout=0,
                 )
                 if not results_pending or perf_counter() > t_limit_result:
                     for agent in results_pending:
@@ -465,7 +489,7 @@ class Synchron(SynchronEvalOnly, Agent):
                     t_duration_explore = perf_counter() - t_start
 
             if not got_trainer_results:
-                update_result = self._get_trainer_results(0.5)
+                update_result = self._get_trainer_results(0)
                 if update_result is not None:
                     got_trainer_results = True
                     n_steps_update = self.step_counter.update - update_steps_start
@@ -499,12 +523,26 @@ class Synchron(SynchronEvalOnly, Agent):
     def _update_algo_state_dicts(self):
         state_dicts = self.algo.state_dicts_network()
         self.trainer.state_dicts_network(state_dicts)
-
+        # optimizer and scheduler states are only fetched every few updates
+        self._updates_since_optimizer_fetch += 1
+        if self._updates_since_optimizer_fetch >= self.optimizer_fetch_interval:
+            self._fetch_optimizer_scheduler_state_dicts()
+
+    def _fetch_optimizer_scheduler_state_dicts(self):
+        if not self._updates_since_optimizer_fetch:
+            return
         state_dicts = self.trainer.state_dicts_optimizer()
         self.algo.load_state_dicts_optimizer(state_dicts)
 
         state_dicts = self.trainer.state_dicts_scheduler()
         self.algo.load_state_dicts_scheduler(state_dicts)
+        self._updates_since_optimizer_fetch = 0
+
+    def save_checkpoint(
+        self, file_path, additional_info: Optional[Dict] = None
+    ) -> None:
+        self._fetch_optimizer_scheduler_state_dicts()
+        super().save_checkpoint(file_path, additional_info)
 
     def _restart_worker_agent(
         self,
@@ -544,6 +582,13 @@ class Synchron(SynchronEvalOnly, Agent):
         if isinstance(result, Exception):
             log_warn = f"Restaring Trainer because of Exception {result}"
             self.logger.warning(log_warn)
+            if self._updates_since_optimizer_fetch:
+                log_warn = (
+                    "Restarted Trainer uses optimizer and scheduler states from "
+                    f"{self._updates_since_optimizer_fetch} updates ago"
+                )
+                self.logger.warning(log_warn)
+                self._updates_since_optimizer_fetch = 0
             self.trainer.close()
             self.trainer = self._create_trainer_agent()
             self.trainer.load_state_dicts_network(self.algo.state_dicts_network())
@@ -568,14 +613,16 @@ class Synchron(SynchronEvalOnly, Agent):
             step_counter=self.step_counter,
             episode_counter=self.episode_counter,
             nice_level=10,
+            torch_threads=self._torch_threads_per_process(),
+            seed=int(self._worker_seeds.spawn(1)[0].generate_state(1)[0]),
         )
 
     def _create_trainer_agent(self):
         return SingleAgentProcess(
             0,
             deepcopy(self.algo),
-            DummyEnv(),
-            DummyEnv(),
+            DummyEnv,
+            DummyEnv,
             self.replay_buffer.copy(),
             self.trainer_device,
             0,
@@ -585,10 +632,17 @@ class Synchron(SynchronEvalOnly, Agent):
             step_counter=self.step_counter,
             episode_counter=self.episode_counter,
             nice_level=0,
+            torch_threads=self._torch_threads_per_process(),
+            compile_update=self.compile_update,
         )
 
+    def _torch_threads_per_process(self) -> int:
+        # worker and trainer share the cores
+        return max(1, (os.cpu_count() or 1) // (self.n_worker + 1))
+
     def load_checkpoint(self, file_path: str) -> None:
         super().load_checkpoint(file_path)
+        self._updates_since_optimizer_fetch = 0
         self.trainer.load_state_dicts_network(self.algo.state_dicts_network())
         self.trainer.load_state_dicts_optimizer(self.algo.state_dicts_optimizer())
         self.trainer.load_state_dicts_scheduler(self.algo.state_dicts_scheduler())
@@ -606,6 +660,9 @@ class Synchron(SynchronEvalOnly, Agent):
         env_train: Optional[gym.Env] = None,
         env_eval: Optional[gym.Env] = None,
         replay_buffer: Optional[ReplayBuffer] = None,
+        compile_update: bool = False,
+        optimizer_fetch_interval: int = 10,
+        seed: Optional[int] = None,
     ):
         cp = torch.load(checkpoint_path)
         confighandler = ConfigHandler()
@@ -628,6 +685,9 @@ class Synchron(SynchronEvalOnly, Agent):
             consecutive_action_steps,
             normalize_actions,
             timeout_worker_after_reaching_limit,
+            compile_update,
+            optimizer_fetch_interval,
+            seed,
         )
         agent.load_checkpoint(checkpoint_path)
         return agent
@@ -49,6 +49,8 @@ class AlgoPlayOnly(EveRLObject, ABC):
 class Algo(EveRLObject, ABC):
     model: Model
     device: torch.device
+    # absolute td errors of the last prioritized batch, one per sample
+    td_errors: Optional[np.ndarray] = None
 
     def state_dicts_network(
         self, destination: Optional[Dict[str, Any]] = None
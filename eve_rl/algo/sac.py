@@ -34,32 +34,28 @@ class SACPlayOnly(AlgoPlayOnly):
         self.device = torch.device("cpu")
 
     def get_exploration_action(self, flat_state: np.ndarray) -> np.ndarray:
-        with torch.no_grad():
+        with torch.inference_mode():
             torch_state = torch.as_tensor(
                 flat_state, dtype=torch.float32, device=self.device
             )
             torch_state = torch_state.unsqueeze(0).unsqueeze(0)
             mean, log_std = self.model.policy.forward_play(torch_state)
-            std = log_std.exp()
-            normal = Normal(mean, std)
-            action = torch.tanh(normal.sample())
+            # reparametrized sample, skips building and validating a Normal per step
+            action = torch.tanh(mean + log_std.exp() * torch.randn_like(mean))
             action = action.squeeze(0).squeeze(0).cpu().detach().numpy()
             action += np.random.normal(0, self.exploration_action_noise)
         return action
 
     def get_eval_action(self, flat_state: np.ndarray) -> np.ndarray:
-        with torch.no_grad():
+        with torch.inference_mode():
             torch_state = torch.as_tensor(
                 flat_state, dtype=torch.float32, device=self.device
             )
             torch_state = torch_state.unsqueeze(0).unsqueeze(0)
             mean, log_std = self.model.policy.forward_play(torch_state)
             if self.stochastic_eval:
-                std = log_std.exp()
-                normal = Normal(mean, std)
-                action = torch.tanh(normal.sample())
+                action = torch.tanh(mean + log_std.exp() * torch.randn_like(mean))
             else:
-                mean, _ = self.model.policy.forward_play(torch_state)
                 action = torch.tanh(mean)
 
             action = action.squeeze(0).squeeze(0).cpu().detach().numpy()
@@ -89,6 +85,7 @@ class SAC(Algo):
         action_scaling: float = 1,
         exploration_action_noise: float = 0.25,
         stochastic_eval: bool = False,
+        mixed_precision: bool = False,
     ):
         self.logger = logging.getLogger(self.__module__)
         # HYPERPARAMETERS
@@ -103,6 +100,7 @@ class SAC(Algo):
         self.reward_scaling = reward_scaling
         self.action_scaling = action_scaling
         self.stochastic_eval = stochastic_eval
+        self.mixed_precision = mixed_precision
 
         self.device = torch.device("cpu")
         self.update_step = 0
@@ -112,39 +110,36 @@ class SAC(Algo):
         self.target_entropy = -torch.ones(1) * n_actions
 
     def get_exploration_action(self, flat_state: np.ndarray) -> np.ndarray:
-        with torch.no_grad():
+        with torch.inference_mode():
             torch_state = torch.as_tensor(
                 flat_state, dtype=torch.float32, device=self.device
             )
             torch_state = torch_state.unsqueeze(0).unsqueeze(0)
             mean, log_std = self.model.policy.forward_play(torch_state)
-            std = log_std.exp()
-            normal = Normal(mean, std)
-            action = torch.tanh(normal.sample())
+            # reparametrized sample, skips building and validating a Normal per step
+            action = torch.tanh(mean + log_std.exp() * torch.randn_like(mean))
             action = action.squeeze(0).squeeze(0).cpu().detach().numpy()
             action += np.random.normal(0, self.exploration_action_noise)
         return action
 
     def get_eval_action(self, flat_state: np.ndarray) -> np.ndarray:
-        with torch.no_grad():
+        with torch.inference_mode():
             torch_state = torch.as_tensor(
                 flat_state, dtype=torch.float32, device=self.device
             )
             torch_state = torch_state.unsqueeze(0).unsqueeze(0)
             mean, log_std = self.model.policy.forward_play(torch_state)
             if self.stochastic_eval:
-                std = log_std.exp()
-                normal = Normal(mean, std)
-                action = torch.tanh(normal.sample())
+                action = torch.tanh(mean + log_std.exp() * torch.randn_like(mean))
             else:
-                mean, _ = self.model.policy.forward_play(torch_state)
                 action = torch.tanh(mean)
 
             action = action.squeeze(0).squeeze(0).cpu().detach().numpy()
         return action * self.action_scaling
 
     def update(self, batch: Batch) -> Tuple[float, float, float]:
-        (all_states, actions, rewards, dones, padding_mask) = batch
+        all_states, actions, rewards, dones, padding_mask = batch[:5]
+        weights = batch.weights
         # actions /= self.action_scaling
 
         all_states = all_states.to(dtype=torch.float32, device=self.device)
@@ -154,20 +149,30 @@ class SAC(Algo):
 
         if padding_mask is not None:
             padding_mask = padding_mask.to(dtype=torch.float32, device=self.device)
+        if weights is not None:
+            weights = weights.to(dtype=torch.float32, device=self.device)
 
         seq_length = actions.shape[1]
         states = torch.narrow(all_states, dim=1, start=0, length=seq_length)
 
         # use all_states for next_actions and next_log_pi for proper hidden_state initilaization
-        expected_q = self._get_expected_q(
-            all_states, rewards, dones, padding_mask, seq_length
-        )
+        with self._autocast():
+            expected_q = self._get_expected_q(
+                all_states, rewards, dones, padding_mask, seq_length
+            )
 
         # q1 update
-        q1_loss = self._update_q1(actions, padding_mask, states, expected_q)
+        q1_loss, td_q1 = self._update_q1(
+            actions, padding_mask, states, expected_q, weights
+        )
 
         # q2 update
-        q2_loss = self._update_q2(actions, padding_mask, states, expected_q)
+        q2_loss, td_q2 = self._update_q2(
+            actions, padding_mask, states, expected_q, weights
+        )
+        if batch.indices is not None:
+            td_errors = (td_q1 + td_q2) / 2
+            self.td_errors = td_errors.flatten(1).mean(dim=1).float().cpu().numpy()
 
         log_pi, policy_loss = self._update_policy(padding_mask, states)
 
@@ -192,17 +197,26 @@ class SAC(Algo):
 
         self.alpha = self.model.log_alpha.exp()
 
+    def _autocast(self):
+        # bfloat16 keeps the float32 exponent range, so no grad scaling is needed
+        return torch.autocast(
+            device_type=self.device.type,
+            dtype=torch.bfloat16,
+            enabled=self.mixed_precision,
+        )
+
     def _update_policy(self, padding_mask, states):
-        new_actions, log_pi = self._get_update_action(states)
-        q1 = self.model.q1(states, new_actions)
-        q2 = self.model.q2(states, new_actions)
-        min_q = torch.min(q1, q2)
+        with self._autocast():
+            new_actions, log_pi = self._get_update_action(states)
+            q1 = self.model.q1(states, new_actions)
+            q2 = self.model.q2(states, new_actions)
+            min_q = torch.min(q1, q2)
 
-        if padding_mask is not None:
-            min_q *= padding_mask
-            log_pi *= padding_mask
+            if padding_mask is not None:
+                min_q *= padding_mask
+                log_pi *= padding_mask
 
-        policy_loss = (self.alpha * log_pi - min_q).mean()
+            policy_loss = (self.alpha * log_pi - min_q).mean()
 
         self.model.policy_optimizer.zero_grad()
         policy_loss.backward()
@@ -211,31 +225,40 @@ class SAC(Algo):
             self.model.policy_scheduler.step()
         return log_pi, policy_loss
 
-    def _update_q2(self, actions, padding_mask, states, expected_q):
-        curr_q2 = self.model.q2(states, actions)
-        if padding_mask is not None:
-            curr_q2 *= padding_mask
-        q2_loss = F.mse_loss(curr_q2, expected_q.detach())
+    def _update_q2(self, actions, padding_mask, states, expected_q, weights=None):
+        with self._autocast():
+            curr_q2 = self.model.q2(states, actions)
+            if padding_mask is not None:
+                curr_q2 *= padding_mask
+            q2_loss = self._q_loss(curr_q2, expected_q, weights)
 
         self.model.q2_optimizer.zero_grad()
         q2_loss.backward()
         self.model.q2_optimizer.step()
         if self.model.q2_scheduler:
             self.model.q2_scheduler.step()
-        return q2_loss
+        return q2_loss, (curr_q2 - expected_q).detach().abs()
 
-    def _update_q1(self, actions, padding_mask, states, expected_q):
-        curr_q1 = self.model.q1(states, actions)
-        if padding_mask is not None:
-            curr_q1 *= padding_mask
-        q1_loss = F.mse_loss(curr_q1, expected_q.detach())
+    def _update_q1(self, actions, padding_mask, states, expected_q, weights=None):
+        with self._autocast():
+            curr_q1 = self.model.q1(states, actions)
+            if padding_mask is not None:
+                curr_q1 *= padding_mask
+            q1_loss = self._q_loss(curr_q1, expected_q, weights)
 
         self.model.q1_optimizer.zero_grad()
         q1_loss.backward()
         self.model.q1_optimizer.step()
         if self.model.q1_scheduler:
             self.model.q1_scheduler.step()
-        return q1_loss
+        return q1_loss, (curr_q1 - expected_q).detach().abs()
+
+    @staticmethod
+    def _q_loss(curr_q, expected_q, weights=None):
+        if weights is None:
+            return F.mse_loss(curr_q, expected_q.detach())
+        # importance sampling weights correct the bias of prioritized sampling
+        return (weights * (curr_q - expected_q.detach()).pow(2)).mean()
 
     def _get_expected_q(self, all_states, rewards, dones, padding_mask, seq_length):
         next_actions, next_log_pi = self._get_update_action(all_states)
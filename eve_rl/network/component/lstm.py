@@ -12,11 +12,13 @@ class LSTM(Network):
         n_inputs: Optional[int] = None,
         output_layer_size: Optional[Union[int, List[int]]] = None,
         init_w: float = 3e-3,
+        use_cuda_graph: bool = False,
     ):
         super().__init__()
         self.n_layer = n_layer
         self.n_nodes = n_nodes
         self.init_w = init_w
+        self.use_cuda_graph = use_cuda_graph
 
         self._lstm: nn.LSTM = None
         self._output_layers: List[nn.Linear] = None
@@ -27,6 +29,8 @@ class LSTM(Network):
             self.output_layer_size = output_layer_size
 
         self._hidden_state = None
+        self._graph: torch.cuda.CUDAGraph = None
+        self._graph_tensors = {}
 
     @property
     def n_inputs(self) -> int:
@@ -91,13 +95,75 @@ class LSTM(Network):
 
     def forward_play(self, obs_batch: torch.Tensor, *args, **kwds) -> torch.Tensor:
         with torch.no_grad():
-            output, self._hidden_state = self._lstm.forward(
-                obs_batch, self._hidden_state
-            )
+            if self.use_cuda_graph and obs_batch.is_cuda:
+                output = self._forward_play_graph(obs_batch)
+            else:
+                output, self._hidden_state = self._lstm.forward(
+                    obs_batch, self._hidden_state
+                )
             if self._output_layers is not None:
                 state = [layer(state) for layer in self._output_layers]
                 state = state[0] if len(state) == 1 else state
         return output
 
+    def _forward_play_graph(self, obs_batch: torch.Tensor) -> torch.Tensor:
+        tensors = self._graph_tensors
+        if (
+            self._graph is None
+            or tensors["obs"].shape != obs_batch.shape
+            or tensors["obs"].device != obs_batch.device
+            or tensors["weight_ptr"] != self._lstm.weight_ih_l0.data_ptr()
+        ):
+            self._capture_graph(obs_batch)
+            tensors = self._graph_tensors
+        tensors["obs"].copy_(obs_batch)
+        if self._hidden_state is None:
+            tensors["h"].zero_()
+            tensors["c"].zero_()
+        self._graph.replay()
+        tensors["h"].copy_(tensors["h_out"])
+        tensors["c"].copy_(tensors["c_out"])
+        self._hidden_state = (tensors["h"], tensors["c"])
+        return tensors["output"].clone()
+
+    def _capture_graph(self, obs_batch: torch.Tensor) -> None:
+        # play shapes are fixed, so launching the recorded kernels replaces the
+        # per step launch overhead of the tiny lstm
+        device = obs_batch.device
+        hidden_shape = (self.n_layer, obs_batch.shape[0], self.n_nodes)
+        obs = torch.zeros_like(obs_batch)
+        h = torch.zeros(hidden_shape, device=device)
+        c = torch.zeros(hidden_shape, device=device)
+
+        warmup_stream = torch.cuda.Stream(device)
+        warmup_stream.wait_stream(torch.cuda.current_stream(device))
+        with torch.cuda.stream(warmup_stream):
+            for _ in range(3):
+                self._lstm.forward(obs, (h, c))
+        torch.cuda.current_stream(device).wait_stream(warmup_stream)
+
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph):
+            output, (h_out, c_out) = self._lstm.forward(obs, (h, c))
+        self._graph = graph
+        self._graph_tensors = {
+            "obs": obs,
+            "h": h,
+            "c": c,
+            "output": output,
+            "h_out": h_out,
+            "c_out": c_out,
+            "weight_ptr": self._lstm.weight_ih_l0.data_ptr(),
+        }
+
+    def __getstate__(self):
+        # captured graphs can neither be copied nor pickled, they are recaptured
+        state = self.__dict__.copy()
+        if self._graph is not None:
+            state["_graph"] = None
+            state["_graph_tensors"] = {}
+            state["_hidden_state"] = None
+        return state
+
     def reset(self):
         self._hidden_state = None
@@ -1,5 +1,6 @@
 from .replaybuffer import ReplayBuffer, Batch, Episode
 from .vanillastep import VanillaStep
+from .prioritizedstep import PrioritizedStep
 from .vanillaepisode import VanillaEpisode
 from .vanillashared import VanillaStepShared, VanillaEpisodeShared
 from .vanillashared import VanillaSharedBase as ReplayBufferShared
@@ -0,0 +1,155 @@
+from typing import List
+import numpy as np
+import torch
+
+from .replaybuffer import Episode, Batch
+from .vanillastep import VanillaStep
+
+
+class KArySumTree:
+    def __init__(self, capacity: int, fanout: int = 16, flush_interval: int = 64):
+        self.capacity = capacity
+        self.fanout = fanout
+        self.flush_interval = flush_interval
+
+        n_levels = 1
+        while fanout**n_levels < capacity:
+            n_levels += 1
+        level_sizes = [fanout**level for level in range(n_levels + 1)]
+        # all levels in one contiguous array, root first
+        self._tree = np.zeros(sum(level_sizes), dtype=np.float64)
+        self._levels: List[np.ndarray] = []
+        start = 0
+        for size in level_sizes:
+            self._levels.append(self._tree[start : start + size])
+            start += size
+
+        self._pending_indices: List[np.ndarray] = []
+        self._pending_priorities: List[np.ndarray] = []
+        self._n_pending = 0
+
+    @property
+    def total(self) -> float:
+        self.flush()
+        return float(self._levels[0][0])
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray) -> None:
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        priorities = np.broadcast_to(
+            np.asarray(priorities, dtype=np.float64), indices.shape
+        )
+        self._pending_indices.append(indices)
+        self._pending_priorities.append(priorities)
+        self._n_pending += indices.size
+        if self._n_pending >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._n_pending:
+            return
+        indices = np.concatenate(self._pending_indices)
+        priorities = np.concatenate(self._pending_priorities)
+        self._pending_indices, self._pending_priorities = [], []
+        self._n_pending = 0
+
+        # later writes to the same leaf win
+        self._levels[-1][indices] = priorities
+        nodes = np.unique(indices)
+        for level in range(len(self._levels) - 1, 0, -1):
+            nodes = np.unique(nodes // self.fanout)
+            children = self._levels[level].reshape(-1, self.fanout)
+            self._levels[level - 1][nodes] = children[nodes].sum(axis=1)
+
+    def priorities(self, indices: np.ndarray) -> np.ndarray:
+        self.flush()
+        return self._levels[-1][indices]
+
+    def sample(self, batch_size: int, rng: np.random.Generator) -> np.ndarray:
+        self.flush()
+        values = rng.uniform(0.0, self._levels[0][0], batch_size)
+        nodes = np.zeros(batch_size, dtype=np.int64)
+        for level in self._levels[1:]:
+            children = level.reshape(-1, self.fanout)[nodes]
+            cumsum = np.cumsum(children, axis=1)
+            child = (values[:, None] >= cumsum).sum(axis=1)
+            child = np.minimum(child, self.fanout - 1)
+            values -= np.where(child > 0, cumsum[np.arange(batch_size), child - 1], 0.0)
+            nodes = nodes * self.fanout + child
+        return np.minimum(nodes, self.capacity - 1)
+
+    def copy(self):
+        self.flush()
+        copy = self.__class__(self.capacity, self.fanout, self.flush_interval)
+        copy._tree[:] = self._tree  # pylint: disable=protected-access
+        return copy
+
+
+class PrioritizedStep(VanillaStep):
+    def __init__(
+        self,
+        capacity: int,
+        batch_size: int,
+        alpha: float = 0.6,
+        fanout: int = 16,
+        epsilon: float = 1e-6,
+        device: torch.device = torch.device("cpu"),
+        beta: float = 0.4,
+        beta_annealing_steps: int = 100000,
+    ):
+        super().__init__(capacity, batch_size, device)
+        self.alpha = alpha
+        self.fanout = fanout
+        self.epsilon = epsilon
+        # importance sampling exponent, annealed linearly to 1 over the samples
+        self.beta = beta
+        self.beta_annealing_steps = beta_annealing_steps
+        self._tree = KArySumTree(int(capacity), fanout)
+        self._max_priority = 1.0
+        self._n_sampled = 0
+        self._rng = np.random.default_rng()
+
+    def push(self, episode: Episode):
+        start = self.position
+        super().push(episode)
+        n_transitions = max(len(episode) - 1, 0)
+        if n_transitions:
+            indices = (start + np.arange(n_transitions)) % self.capacity
+            self._tree.update(indices, self._max_priority**self.alpha)
+
+    def sample(self) -> Batch:
+        indices = self._tree.sample(self.batch_size, self._rng)
+        indices = np.minimum(indices, len(self) - 1)
+
+        progress = min(1.0, self._n_sampled / max(self.beta_annealing_steps, 1))
+        beta = self.beta + (1.0 - self.beta) * progress
+        self._n_sampled += 1
+        probabilities = self._tree.priorities(indices) / self._tree.total
+        weights = (len(self) * probabilities) ** -beta
+        weights /= weights.max()
+        weights = torch.as_tensor(weights, dtype=torch.float32, device=self.device)
+
+        batch = self._to_batch(indices)
+        return batch._replace(weights=weights.view(-1, 1, 1), indices=indices)
+
+    def update_priorities(self, indices: np.ndarray, priorities: np.ndarray) -> None:
+        priorities = np.abs(np.asarray(priorities, dtype=np.float64)) + self.epsilon
+        self._max_priority = max(self._max_priority, float(priorities.max()))
+        self._tree.update(indices, priorities**self.alpha)
+
+    def copy(self):
+        copy = self.__class__(
+            self.capacity,
+            self.batch_size,
+            self.alpha,
+            self.fanout,
+            self.epsilon,
+            self.device,
+            self.beta,
+            self.beta_annealing_steps,
+        )
+        self._copy_storage(copy)
+        # pylint: disable=protected-access
+        copy._tree = self._tree.copy()
+        copy._max_priority = self._max_priority
+        copy._n_sampled = self._n_sampled
+        return copy
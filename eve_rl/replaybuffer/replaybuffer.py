@@ -72,6 +72,9 @@ class Batch(NamedTuple):
     rewards: torch.Tensor
     terminals: torch.Tensor
     padding_mask: torch.Tensor = None
+    # only set by prioritized buffers
+    weights: torch.Tensor = None
+    indices: np.ndarray = None
 
     def to(self, device: torch.device, non_blocking=False):
         obs = self.obs.to(
@@ -102,7 +105,17 @@ class Batch(NamedTuple):
             ).share_memory_()
         else:
             padding_mask = None
-        return Batch(obs, actions, rewards, terminals, padding_mask)
+        if self.weights is not None:
+            weights = self.weights.to(
+                device,
+                dtype=torch.float32,
+                non_blocking=non_blocking,
+            ).share_memory_()
+        else:
+            weights = None
+        return Batch(
+            obs, actions, rewards, terminals, padding_mask, weights, self.indices
+        )
 
 
 class ReplayBuffer(EveRLObject, ABC):
@@ -1,12 +1,80 @@
-from time import sleep
-from multiprocessing.synchronize import Lock as mp_lock
+from multiprocessing import resource_tracker
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
 from multiprocessing.synchronize import Event as mp_event
+import platform
+from typing import List, NamedTuple, Tuple, Union
+import numpy as np
 import torch
 import torch.multiprocessing as mp
 
-from .replaybuffer import ReplayBuffer, Episode, Batch
+from .replaybuffer import ReplayBuffer, Episode, EpisodeReplay, Batch
 from .vanillaepisode import VanillaEpisode
 from .vanillastep import VanillaStep
+from ..util import clear_and_close_queues
+
+# smaller episodes are pickled, creating and mapping a segment costs more than
+# copying them through the pipe
+shared_episode_min_bytes = 1 << 19
+
+
+class SharedEpisode(NamedTuple):
+    # segment name and (shape, dtype, offset) of every EpisodeReplay field
+    name: str
+    layout: List[Tuple[Tuple[int, ...], str, int]]
+
+
+def share_episode(episode: EpisodeReplay) -> Union[SharedEpisode, EpisodeReplay]:
+    fields = (episode.flat_obs, episode.actions, episode.rewards, episode.terminals)
+    layout = []
+    size = 0
+    for field in fields:
+        first = np.asarray(field[0])
+        shape = (len(field),) + first.shape
+        layout.append((shape, first.dtype.str, size))
+        # 64 byte aligned, every field starts on its own cache line
+        size += -(-first.dtype.itemsize * int(np.prod(shape)) // 64) * 64
+    # windows frees a segment with its last handle, the pusher may exit first
+    if size < shared_episode_min_bytes or platform.system() == "Windows":
+        return EpisodeReplay(*(np.stack(field) for field in fields))
+
+    # named segments outlive the pushing process, the buffer process unlinks them
+    shm = SharedMemory(create=True, size=size)
+    for field, (shape, dtype, offset) in zip(fields, layout):
+        np.stack(field, out=np.ndarray(shape, dtype, shm.buf, offset))
+    # pylint: disable=protected-access
+    resource_tracker.unregister(shm._name, "shared_memory")
+    shm.close()
+    return SharedEpisode(shm.name, layout)
+
+
+def push_shared_episode(
+    replay_buffer: ReplayBuffer, episode: Union[SharedEpisode, EpisodeReplay]
+) -> None:
+    if not isinstance(episode, SharedEpisode):
+        replay_buffer.push(episode)
+        return
+    shm = SharedMemory(episode.name)
+    try:
+        # views on the segment, the replay buffer copies what it keeps
+        replay_buffer.push(
+            EpisodeReplay(
+                *(
+                    np.ndarray(shape, dtype, shm.buf, offset)
+                    for shape, dtype, offset in episode.layout
+                )
+            )
+        )
+    finally:
+        shm.unlink()
+        shm.close()
+
+
+def release_shared_episode(episode: Union[SharedEpisode, EpisodeReplay]) -> None:
+    if isinstance(episode, SharedEpisode):
+        shm = SharedMemory(episode.name)
+        shm.unlink()
+        shm.close()
 
 
 class VanillaSharedBase(ReplayBuffer):
@@ -15,18 +83,19 @@ class VanillaSharedBase(ReplayBuffer):
         push_queue: mp.SimpleQueue,
         sample_queue: mp.SimpleQueue,
         task_queue: mp.SimpleQueue,
-        result_queue: mp.SimpleQueue,
-        request_lock: mp_lock,
         shutdown_event: mp_event,
         batch_size: int,
+        n_prefetched: mp.Value,
+        length: mp.Value,
     ):
         self._push_queue = push_queue
         self._task_queue = task_queue
         self._sample_queue = sample_queue
-        self._result_queue = result_queue
-        self._request_lock = request_lock
         self._shutdown_event = shutdown_event
         self._batch_size = batch_size
+        self._n_prefetched = n_prefetched
+        # written by the buffer process after every push, no round trip to read it
+        self._length = length
 
     @property
     def batch_size(self) -> int:
@@ -34,15 +103,20 @@ class VanillaSharedBase(ReplayBuffer):
 
     def push(self, episode: Episode):
 
-        if not self._shutdown_event.is_set():
-            self._push_queue.put(episode.to_replay())
+        if not self._shutdown_event.is_set() and len(episode) > 0:
+            self._push_queue.put(share_episode(episode.to_replay()))
 
     def sample(self) -> Batch:
 
         if self._shutdown_event.is_set():
             return Batch([], [], [], [], [])
 
-        return self._sample_queue.get()
+        batch = self._sample_queue.get()
+        with self._n_prefetched.get_lock():
+            self._n_prefetched.value -= 1
+        # wakes the buffer process to refill the freed prefetch slot
+        self._task_queue.put(["sampled"])
+        return batch
 
     def __len__(
         self,
@@ -50,10 +124,7 @@ class VanillaSharedBase(ReplayBuffer):
         if self._shutdown_event.is_set():  #
             return 0
 
-        with self._request_lock:
-            self._task_queue.put(["length"])
-            length = self._result_queue.get()
-        return length
+        return self._length.value
 
     def copy(self):
         return self
@@ -63,18 +134,26 @@ class VanillaSharedBase(ReplayBuffer):
 
 
 class VanillaStepShared(VanillaSharedBase):
-    def __init__(self, capacity, batch_size, sample_device: torch.device):
+    def __init__(
+        self,
+        capacity,
+        batch_size,
+        sample_device: torch.device,
+        n_prefetch_batches: int = 4,
+    ):
         super().__init__(
             mp.SimpleQueue(),
             mp.SimpleQueue(),
             mp.SimpleQueue(),
-            mp.SimpleQueue(),
-            mp.Lock(),
             mp.Event(),
             batch_size,
+            mp.Value("i", 0),
+            mp.Value("i", 0, lock=False),
         )
         self.capacity = capacity
         self.sample_device = sample_device
+        # batches sampled ahead, so sample() does not wait for the buffer process
+        self.n_prefetch_batches = n_prefetch_batches
         self._process = mp.Process(target=self.run)
         self._process.start()
 
@@ -85,24 +164,30 @@ class VanillaStepShared(VanillaSharedBase):
     def loop(self, internal_replay_buffer: ReplayBuffer):
         while not self._shutdown_event.is_set():
             if (
-                self._sample_queue.empty()
+                self._n_prefetched.value < self.n_prefetch_batches
                 and len(internal_replay_buffer) > self.batch_size
             ):
                 batch = internal_replay_buffer.sample()
                 if self.sample_device != torch.device("mps"):
                     batch = batch.to(self.sample_device)
+                with self._n_prefetched.get_lock():
+                    self._n_prefetched.value += 1
                 self._sample_queue.put(batch)
             elif not self._task_queue.empty():
                 task = self._task_queue.get()
-                if task[0] == "length":
-                    self._result_queue.put(len(internal_replay_buffer))
-                elif task[0] == "shutdown":
+                if task[0] == "shutdown":
                     break
             elif not self._push_queue.empty():
-                batch = self._push_queue.get()
-                internal_replay_buffer.push(batch)
+                push_shared_episode(internal_replay_buffer, self._push_queue.get())
+                self._length.value = len(internal_replay_buffer)
             else:
-                sleep(0.0001)
+                # prefetch is full or the buffer too small, only a push or a task
+                # (sampled batch or shutdown) can change that
+                # pylint: disable=protected-access
+                wait([self._push_queue._reader, self._task_queue._reader])
+        # segments of episodes that were never pushed would stay in /dev/shm
+        while not self._push_queue.empty():
+            release_shared_episode(self._push_queue.get())
         internal_replay_buffer.close()
 
     def copy(self):
@@ -110,16 +195,25 @@ class VanillaStepShared(VanillaSharedBase):
             self._push_queue,
             self._sample_queue,
             self._task_queue,
-            self._result_queue,
-            self._request_lock,
             self._shutdown_event,
             self.batch_size,
+            self._n_prefetched,
+            self._length,
         )
 
     def close(self):
+        if self._process is None:
+            return
         self._shutdown_event.set()
-        self._process.join()
+        # wakes the loop right away instead of after the next poll timeout
+        self._task_queue.put(["shutdown"])
+        self._process.join(5)
+        if self._process.exitcode is None:
+            self._process.kill()
+            self._process.join()
         self._process.close()
+        self._process = None
+        clear_and_close_queues([self._sample_queue, self._push_queue, self._task_queue])
 
 
 class VanillaEpisodeShared(VanillaStepShared):
@@ -5,10 +5,22 @@ from .replaybuffer import ReplayBuffer, Episode, Batch
 
 
 class VanillaStep(ReplayBuffer):
-    def __init__(self, capacity: int, batch_size: int):
+    def __init__(
+        self,
+        capacity: int,
+        batch_size: int,
+        device: torch.device = torch.device("cpu"),
+    ):
         self.capacity = capacity
         self._batch_size = batch_size
-        self.buffer = []
+        # storing on the update device saves the host to device copy of every batch
+        self.device = device
+        # one ring tensor per field, allocated on the first push when shapes are known
+        self._states: torch.Tensor = None  # state + next_state
+        self._actions: torch.Tensor = None
+        self._rewards: torch.Tensor = None
+        self._terminals: torch.Tensor = None
+        self._size = 0
         self.position = 0
 
     @property
@@ -16,47 +28,80 @@ class VanillaStep(ReplayBuffer):
         return self._batch_size
 
     def push(self, episode: Episode):
-        for i in range(len(episode) - 1):
-            if len(self.buffer) < self.capacity:
-                self.buffer.append(None)
-            episode_np = (
-                np.array(episode.flat_obs[i : i + 2]),  # state + next_state
-                np.array(episode.actions[i]),
-                np.array(episode.rewards[i]),
-                np.array(episode.terminals[i]),
-            )
-            self.buffer[self.position] = episode_np
-            self.position = int((self.position + 1) % self.capacity)  # as a ring buffer
+        n_transitions = len(episode) - 1
+        if n_transitions <= 0:
+            return
+        flat_obs = np.asarray(episode.flat_obs)
+        states = np.stack(
+            (flat_obs[:n_transitions], flat_obs[1 : n_transitions + 1]), axis=1
+        )
+        fields = [
+            states,
+            np.asarray(episode.actions[:n_transitions]),
+            np.asarray(episode.rewards[:n_transitions]),
+            np.asarray(episode.terminals[:n_transitions]),
+        ]
+        capacity = int(self.capacity)
+        if n_transitions > capacity:
+            # only the newest transitions would survive the ring anyway
+            self.position = int((self.position + n_transitions - capacity) % capacity)
+            fields = [field[-capacity:] for field in fields]
+            n_transitions = capacity
+        fields = [torch.from_numpy(field).to(self.device) for field in fields]
 
-    def sample(self) -> Batch:
-        batch = random.sample(self.buffer, self.batch_size)
+        if self._states is None:
+            self._states, self._actions, self._rewards, self._terminals = [
+                self._allocate(field) for field in fields
+            ]
+
+        n_first = min(n_transitions, capacity - self.position)
+        storage = [self._states, self._actions, self._rewards, self._terminals]
+        for buffer, field in zip(storage, fields):
+            buffer[self.position : self.position + n_first] = field[:n_first]
+            buffer[: n_transitions - n_first] = field[n_first:]
+        self.position = int((self.position + n_transitions) % capacity)
+        self._size = min(self._size + n_transitions, capacity)
 
-        batch = list(map(np.stack, zip(*batch)))  # stack for each element
-        """ 
-        the * serves as unpack: sum(a,b) <=> batch=(a,b), sum(*batch) ;
-        zip: a=[1,2], b=[2,3], zip(a,b) => [(1, 2), (2, 3)] ;
-        the map serves as mapping the function on each list element: map(square, [2,3]) => [4,9] ;
-        np.stack((1,2)) => array([1, 2])
-        """
+    def _allocate(self, data: torch.Tensor) -> torch.Tensor:
+        shape = (int(self.capacity),) + tuple(data.shape[1:])
+        return torch.empty(shape, dtype=data.dtype, device=self.device)
 
-        batch = [torch.from_numpy(batch_entry) for batch_entry in batch]
-        batch[1] = batch[1].unsqueeze(1)
-        batch[2] = batch[2].unsqueeze(1).unsqueeze(1)
-        batch[3] = batch[3].unsqueeze(1).unsqueeze(1)
+    def sample(self) -> Batch:
+        indices = random.sample(range(self._size), self.batch_size)
+        return self._to_batch(indices)
 
-        return Batch(*batch)
+    def _to_batch(self, indices) -> Batch:
+        # a single gather per field, straight from the ring tensors
+        indices = torch.as_tensor(indices, dtype=torch.long, device=self.device)
+        return Batch(
+            self._states[indices],
+            self._actions[indices].unsqueeze(1),
+            self._rewards[indices].unsqueeze(1).unsqueeze(1),
+            self._terminals[indices].unsqueeze(1).unsqueeze(1),
+        )
 
     def __len__(
         self,
     ):
-        return len(self.buffer)
+        return self._size
 
     def copy(self):
-        copy = self.__class__(self.capacity, self.batch_size)
-        for i in range(len(self.buffer)):
-            copy.buffer.append(self.buffer[i])
-        copy.position = self.position
+        copy = self.__class__(self.capacity, self.batch_size, self.device)
+        self._copy_storage(copy)
         return copy
 
+    def _copy_storage(self, copy: "VanillaStep") -> None:
+        # pylint: disable=protected-access
+        if self._states is not None:
+            copy._states = self._states.clone()
+            copy._actions = self._actions.clone()
+            copy._rewards = self._rewards.clone()
+            copy._terminals = self._terminals.clone()
+        copy._size = self._size
+        copy.position = self.position
+
     def close(self):
-        del self.buffer
+        del self._states
+        del self._actions
+        del self._rewards
+        del self._terminals
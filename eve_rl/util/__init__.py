@@ -3,3 +3,4 @@ from .everlobject import EveRLObject
 from .dummyenv import DummyEnv
 from .envfromcp import get_env_from_checkpoint
 from .flattenobs import flatten_obs
+from .queues import clear_and_close_queues
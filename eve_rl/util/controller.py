@@ -70,6 +70,8 @@ class Controller:
         self.fluoroscopy = fluoroscopy
         self.target = target
         self.last_action = self.env.action_space.sample() * 0.0
+        self._flat_obs_to_obs = None
+        self._obs_flat = None
 
     def step(
         self,
@@ -120,8 +122,11 @@ class Controller:
             raise ValueError("Wrong target shape")
 
     def _get_action(self, obs):
-        obs_flat, _ = flatten_obs(obs)
-        action = self.agent.algo.get_eval_action(obs_flat)
+        if self._obs_flat is None:
+            self._obs_flat, self._flat_obs_to_obs = flatten_obs(obs)
+        else:
+            flatten_obs(obs, self._flat_obs_to_obs, out=self._obs_flat)
+        action = self.agent.algo.get_eval_action(self._obs_flat)
         action = action.reshape(self.last_action.shape)
         if self.agent.normalize_actions:
             action *= self.intervention.action_space.high
@@ -1,35 +1,47 @@
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 import numpy as np
 
 
 def flatten_obs(
-    obs: Union[np.ndarray, List[np.ndarray], Dict[str, np.ndarray]]
+    obs: Union[np.ndarray, List[np.ndarray], Dict[str, np.ndarray]],
+    flat_obs_to_obs: Optional[Union[Tuple, List, Dict]] = None,
+    out: Optional[np.ndarray] = None,
 ) -> Tuple[np.ndarray, Union[Tuple, List, Dict]]:
     if isinstance(obs, np.ndarray):
+        if out is not None:
+            np.copyto(out, obs.reshape(-1))
+            return out, obs.shape
         return obs.flatten(), obs.shape
     if isinstance(obs, list):
-        obs_flat_list = []
-        flat_obs_to_obs = []
-        idx = 0
-        for obs_entry in obs:
-            shape = obs_entry.shape
-            obs_flat = obs_entry.flatten()
-            obs_flat_list.append(obs_flat)
-            flat_obs_to_obs.append((shape, (idx, idx + obs_flat.size)))
-            idx += obs_flat.size
-        obs_flat_np = np.concatenate(obs_flat_list)
-        return obs_flat_np, flat_obs_to_obs
-    if isinstance(obs, Dict):
-        obs_flat_list = []
-        flat_obs_to_obs = {}
-        current_idx = 0
-        for name, obs_entry in obs.items():
-            shape = obs_entry.shape
-            obs_flat = obs_entry.flatten()
-            obs_flat_list.append(obs_flat)
-            flat_obs_to_obs[name] = (shape, (current_idx, current_idx + obs_flat.size))
-            current_idx += obs_flat.size
-        obs_flat_np = np.concatenate(obs_flat_list)
-        return obs_flat_np, flat_obs_to_obs
+        if flat_obs_to_obs is None:
+            flat_obs_to_obs = []
+            idx = 0
+            for obs_entry in obs:
+                flat_obs_to_obs.append((obs_entry.shape, (idx, idx + obs_entry.size)))
+                idx += obs_entry.size
+        entries = list(zip(obs, flat_obs_to_obs))
+    elif isinstance(obs, Dict):
+        if flat_obs_to_obs is None:
+            flat_obs_to_obs = {}
+            current_idx = 0
+            for name, obs_entry in obs.items():
+                flat_obs_to_obs[name] = (
+                    obs_entry.shape,
+                    (current_idx, current_idx + obs_entry.size),
+                )
+                current_idx += obs_entry.size
+        entries = [(obs[name], mapping) for name, mapping in flat_obs_to_obs.items()]
+    else:
+        raise ValueError("Wrong Observation Type")
 
-    raise ValueError("Wrong Observation Type")
+    # fill one preallocated array instead of flattening and concatenating
+    if out is None:
+        size = max((end for _, (_, (_, end)) in entries), default=0)
+        dtype = np.result_type(*(obs_entry for obs_entry, _ in entries))
+        obs_flat_np = np.empty(size, dtype=dtype)
+    else:
+        # reused by callers that do not keep the flat observation
+        obs_flat_np = out
+    for obs_entry, (_, (start, end)) in entries:
+        obs_flat_np[start:end] = np.ravel(obs_entry)
+    return obs_flat_np, flat_obs_to_obs
@@ -0,0 +1,17 @@
+from typing import Iterable
+
+import torch.multiprocessing as mp
+
+
+def clear_and_close_queues(queues: Iterable[mp.SimpleQueue], max_items: int = 128):
+    for queue_ in queues:
+        try:
+            # releases the shared memory of items never read. bounded, the other
+            # process might still be publishing
+            for _ in range(max_items):
+                if queue_.empty():
+                    break
+                queue_.get()
+        except (ValueError, OSError):
+            pass
+        queue_.close()
@@ -1,3 +1,4 @@
+from copy import deepcopy
 import csv
 import os
 from torch import optim
@@ -19,6 +20,7 @@ def sac_training(
     consecutive_explore_steps=1,
     steps_between_eval=1e4,
     eval_episodes=100,
+    eval_workers=8,
     batch_size=164,
     heatup=1e3,
     log_folder: str = os.getcwd() + "/fast_learner_example_results/",
@@ -27,6 +29,9 @@ def sac_training(
     *args,
     **kwargs,
 ):
+    # batch and layer shapes are fixed, let cudnn pick the fastest kernels once
+    torch.backends.cudnn.benchmark = True
+    torch.set_float32_matmul_precision("high")
     if not os.path.isdir(log_folder):
         os.mkdir(log_folder)
     success = 0.0
@@ -72,7 +77,12 @@ def sac_training(
         policy_scheduler=policy_scheduler,
         lr_alpha=lr,
     )
-    algo = eve_rl.algo.SAC(sac_model, n_actions=n_actions, gamma=gamma)
+    algo = eve_rl.algo.SAC(
+        sac_model,
+        n_actions=n_actions,
+        gamma=gamma,
+        mixed_precision=device.type == "cuda",
+    )
     replay_buffer = eve_rl.replaybuffer.VanillaStep(replay_buffer, batch_size)
     agent = eve_rl.agent.Single(
         algo,
@@ -110,6 +120,16 @@ def sac_training(
         writer.writerow([lr, gamma, hidden_layers])
         writer.writerow(["Episodes", "Steps", "Reward", "Success"])
     # agent.load_checkpoint(log_folder, "checkpoint_10053.pt")
+    # evaluation episodes are independent, so they are spread over worker processes
+    eval_agent = None
+    if eval_workers > 0:
+        eval_agent = eve_rl.agent.SynchronEvalOnly(
+            deepcopy(agent.algo), env, n_worker=eval_workers, normalize_actions=True
+        )
+    if device.type == "cuda":
+        # compiled in place, so state dict keys and the saved config stay untouched
+        for net in agent.algo.model:
+            net.compile(dynamic=False)
     next_eval_step_limt = steps_between_eval + agent.step_counter.exploration
     training_steps += agent.step_counter.exploration
     print("starting heatup")
@@ -123,14 +143,19 @@ def sac_training(
         agent.update(steps=update_steps)
 
         if step_counter.exploration >= next_eval_step_limt:
-            agent.save_checkpoint(
-                os.path.join(log_folder, f"checkpoint_{step_counter.exploration}")
+            checkpoint_path = os.path.join(
+                log_folder, f"checkpoint_{step_counter.exploration}"
             )
-            episodes = agent.evaluate(episodes=eval_episodes)
+            agent.save_checkpoint(checkpoint_path)
+            if eval_agent is not None:
+                eval_agent.load_checkpoint(checkpoint_path)
+                episodes = eval_agent.evaluate(episodes=eval_episodes)
+            else:
+                episodes = agent.evaluate(episodes=eval_episodes)
             rewards = [episode.episode_reward for episode in episodes]
             successes = [episode.infos[-1]["success"] for episode in episodes]
-            reward = sum(rewards) / len(rewards)
-            success = sum(successes) / len(successes)
+            reward = float(np.mean(rewards))
+            success = float(np.mean(successes))
             next_eval_step_limt += steps_between_eval
 
             print(
@@ -147,6 +172,8 @@ def sac_training(
                     ]
                 )
 
+    if eval_agent is not None:
+        eval_agent.close()
     return success, agent.step_counter.exploration
 
 
@@ -24,6 +24,7 @@ def sac_training(
     eval_episodes=1,
     batch_size=2,
     heatup=1e2,
+    n_worker=2,
     log_folder: str = os.getcwd() + "/fast_learner_example_results/",
     id_training=0,
     name="fast_learner",
@@ -40,6 +41,8 @@ def sac_training(
 
     n_observations = obs_np.shape[0]
     n_actions = env.action_space.sample().flatten().shape[0]
+    # only needed for the space sizes, the workers build their own from make_env
+    env.close()
     q1_mlp = eve_rl.network.component.MLP(hidden_layers)
     q_net_1 = eve_rl.network.QNetwork(q1_mlp, n_observations, n_actions)
     q1_optimizer = eve_rl.optim.Adam(q_net_1, lr)
@@ -74,14 +77,18 @@ def sac_training(
         lr_alpha=lr,
     )
     algo = eve_rl.algo.SAC(sac_model, n_actions=n_actions, gamma=gamma)
-    replay_buffer = eve_rl.replaybuffer.VanillaStep(replay_buffer, batch_size)
-    agent = eve_rl.agent.Single(
+    replay_buffer = eve_rl.replaybuffer.VanillaStepShared(
+        replay_buffer, batch_size, device
+    )
+    # env factories are called inside the worker processes, no env gets pickled
+    agent = eve_rl.agent.Synchron(
         algo,
-        env,
-        env,
+        make_env,
+        make_env,
         replay_buffer,
+        n_worker=n_worker,
+        trainer_device=device,
         consecutive_action_steps=1,
-        device=device,
         normalize_actions=True,
     )
     while True:
@@ -102,10 +109,13 @@ def sac_training(
     step_counter = agent.step_counter
     print("starting training loop")
     while step_counter.exploration < training_steps:
-        agent.explore(steps=consecutive_explore_steps)
+        # one update per exploration step, so updates target the step count
+        # reached after this round's exploration
+        step_limit = step_counter.exploration + consecutive_explore_steps
+        agent.explore_and_update(
+            explore_step_limit=step_limit, update_step_limit=step_limit
+        )
         step_counter = agent.step_counter
-        update_steps = step_counter.exploration - step_counter.update
-        agent.update(steps=update_steps)
 
         if step_counter.exploration >= next_eval_step_limt:
             agent.save_checkpoint(
@@ -114,8 +124,8 @@ def sac_training(
             episodes = agent.evaluate(episodes=eval_episodes)
             rewards = [episode.episode_reward for episode in episodes]
             successes = [episode.terminals[-1] for episode in episodes]
-            reward = sum(rewards) / len(rewards)
-            success = sum(successes) / len(successes)
+            reward = float(np.mean(rewards))
+            success = float(np.mean(successes))
             next_eval_step_limt += steps_between_eval
 
             print(
@@ -132,6 +142,7 @@ def sac_training(
                     ]
                 )
 
+    agent.close()
     return success, agent.step_counter.exploration
 
 